@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+import json
+import os
+import pathlib
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# markers printed by constructor's shell installer header, in the order they appear,
+# paired with the name of the phase that begins when the marker is seen
+# (the installer prints nothing between linking packages and replacing their prefix
+# placeholders, so both are timed together as the install phase)
+phase_markers = [
+    (re.compile(r"^Unpacking payload"), "extract"),
+    (re.compile(r"^Installing .*environment"), "install"),
+    (re.compile(r"^running post install"), "post_install"),
+    (re.compile(r"^installation finished"), None),
+]
+
+
+def disk_usage(path: pathlib.Path) -> Tuple[int, int]:
+    """Return (bytes, file count) for the tree rooted at path.
+
+    Like du, hardlinked files are only counted once, since conda hardlinks the
+    extracted package cache in pkgs/ into the prefix.
+    """
+    total_bytes = 0
+    seen_inodes = set()
+    for root, dirs, files in os.walk(path):
+        for fname in files:
+            try:
+                st = os.lstat(os.path.join(root, fname))
+            except FileNotFoundError:
+                # file was removed while walking (e.g. by post_install)
+                continue
+            if (st.st_dev, st.st_ino) in seen_inodes:
+                continue
+            seen_inodes.add((st.st_dev, st.st_ino))
+            total_bytes += st.st_blocks * 512
+    return total_bytes, len(seen_inodes)
+
+
+def filesystem_usage(path: pathlib.Path) -> Tuple[int, int]:
+    """Return (used bytes, used inodes) of the filesystem containing path."""
+    st = os.statvfs(path)
+    return (st.f_blocks - st.f_bfree) * st.f_frsize, st.f_files - st.f_ffree
+
+
+class DiskSampler(threading.Thread):
+    """Poll filesystem usage to record the peak growth from a baseline while installing.
+
+    Only the filesystem counters are read, which is cheap compared to walking the
+    prefix tree, so sampling does not compete with the installer for disk and CPU.
+    Usage by anything else writing to the same filesystem is counted as well.
+    """
+
+    def __init__(self, path: pathlib.Path, interval: float):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.base_bytes, self.base_inodes = filesystem_usage(path)
+        self.peak_bytes = 0
+        self.peak_inodes = 0
+        self._stop_event = threading.Event()
+
+    def sample(self) -> None:
+        used_bytes, used_inodes = filesystem_usage(self.path)
+        self.peak_bytes = max(self.peak_bytes, used_bytes - self.base_bytes)
+        self.peak_inodes = max(self.peak_inodes, used_inodes - self.base_inodes)
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+
+def run_installer(
+    installer_path: pathlib.Path, prefix: pathlib.Path, sample_interval: float
+) -> Dict[str, Any]:
+    cmdline = ["bash", str(installer_path), "-b", "-p", str(prefix)]
+    env = os.environ.copy()
+    env.pop("CONDARC", None)
+
+    # the prefix does not exist yet, so sample the filesystem of its parent
+    sampler = DiskSampler(prefix.parent, interval=sample_interval)
+    phases: Dict[str, float] = {}
+    phase_name = "startup"
+
+    start = time.perf_counter()
+    phase_start = start
+    sampler.start()
+    proc = subprocess.Popen(
+        cmdline,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    for line in proc.stdout:
+        sys.stdout.write(line)
+        for marker_re, next_phase in phase_markers:
+            if marker_re.match(line.strip()):
+                now = time.perf_counter()
+                phases[phase_name] = phases.get(phase_name, 0.0) + now - phase_start
+                phase_name, phase_start = next_phase, now
+                break
+    proc.wait()
+    end = time.perf_counter()
+    sampler.stop()
+
+    if phase_name is not None:
+        phases[phase_name] = phases.get(phase_name, 0.0) + end - phase_start
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"Installer {installer_path} failed with exit code {proc.returncode}"
+        )
+
+    # walk the tree only once the timed installation is over
+    final_bytes, final_files = disk_usage(prefix)
+    return dict(
+        total=end - start,
+        phases=phases,
+        phase_notes=dict(
+            install=(
+                "includes prefix placeholder replacement, which the installer does"
+                " not report separately (see profile_prefix_replacement.py)"
+            )
+        ),
+        peak_disk_bytes=sampler.peak_bytes,
+        peak_inode_count=sampler.peak_inodes,
+        final_disk_bytes=final_bytes,
+        final_file_count=final_files,
+    )
+
+
+def time_activation(prefix: pathlib.Path) -> float:
+    conda_path = prefix / "bin" / "conda"
+    script = f'eval "$("{conda_path}" shell.bash hook)" && conda activate "{prefix}"'
+    start = time.perf_counter()
+    subprocess.run(["bash", "--norc", "--noprofile", "-c", script], check=True)
+    return time.perf_counter() - start
+
+
+def time_imports(
+    prefix: pathlib.Path, modules: List[str]
+) -> Dict[str, Optional[float]]:
+    python_path = prefix / "bin" / "python"
+    import_times = {}
+    for module in modules:
+        # each module is timed in a fresh interpreter so caches are cold for it
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [str(python_path), "-c", f"import {module}"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        elapsed = time.perf_counter() - start
+        import_times[module] = elapsed if proc.returncode == 0 else None
+    return import_times
+
+
+def benchmark(
+    installer_path: pathlib.Path,
+    modules: List[str],
+    work_dir: Optional[pathlib.Path] = None,
+    sample_interval: float = 1.0,
+    keep_prefix: bool = False,
+) -> Dict[str, Any]:
+    tmp_dir = pathlib.Path(tempfile.mkdtemp(prefix="radioconda-bench-", dir=work_dir))
+    prefix = tmp_dir / "prefix"
+    try:
+        result = run_installer(installer_path, prefix, sample_interval)
+        result["phases"]["activation"] = time_activation(prefix)
+        result["imports"] = time_imports(prefix, modules)
+    finally:
+        if not keep_prefix:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    result["installer"] = installer_path.name
+    result["installer_bytes"] = installer_path.stat().st_size
+    return result
+
+
+size_metrics = (
+    "peak_disk_bytes",
+    "peak_inode_count",
+    "final_file_count",
+    "installer_bytes",
+)
+
+
+def flatten_metrics(result: Dict[str, Any]) -> Dict[str, float]:
+    metrics = {"total": result["total"]}
+    for phase, elapsed in result["phases"].items():
+        metrics[f"phase.{phase}"] = elapsed
+    for module, elapsed in result.get("imports", {}).items():
+        if elapsed is not None:
+            metrics[f"import.{module}"] = elapsed
+    for key in size_metrics:
+        if result.get(key):
+            metrics[key] = result[key]
+    return metrics
+
+
+def compare(
+    result: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    min_seconds: float = 0.5,
+) -> List[str]:
+    """Return a list of metrics that regressed by more than threshold (fraction).
+
+    Timing metrics must also slow down by at least min_seconds to count, so that
+    jitter in very short phases is not reported as a regression.
+    """
+    current_metrics = flatten_metrics(result)
+    baseline_metrics = flatten_metrics(baseline)
+    regressions = []
+    for key, current in current_metrics.items():
+        base = baseline_metrics.get(key)
+        if not base:
+            continue
+        change = (current - base) / base
+        print(f"{key:>32}: {base:14.3f} -> {current:14.3f} ({change:+.1%})")
+        is_timing = key not in size_metrics
+        if is_timing and current - base < min_seconds:
+            continue
+        if change > threshold:
+            regressions.append(key)
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmark a built shell (.sh) installer by running it in batch mode into a"
+            " temporary prefix, recording per-phase wall time, peak disk usage, file"
+            " counts, and first-import time of key modules."
+        )
+    )
+    parser.add_argument(
+        "installer",
+        type=pathlib.Path,
+        help="Path to the built .sh installer to benchmark.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=pathlib.Path,
+        default=None,
+        help="JSON file in which the benchmark results will be stored.",
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        type=pathlib.Path,
+        default=None,
+        help=(
+            "JSON results from a baseline release to compare against. The exit status"
+            " is nonzero if any metric regresses by more than the threshold."
+        ),
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help=(
+            "Fractional increase over the baseline that counts as a regression."
+            " (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--min_seconds",
+        type=float,
+        default=0.5,
+        help=(
+            "Minimum absolute slowdown in seconds for a timing metric to count as a"
+            " regression. (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "-m",
+        "--module",
+        dest="modules",
+        action="append",
+        default=None,
+        help=(
+            "Module whose first-import time is measured, may be given multiple times."
+            " (default: gnuradio, numpy)"
+        ),
+    )
+    parser.add_argument(
+        "--work_dir",
+        type=pathlib.Path,
+        default=None,
+        help=(
+            "Directory in which temporary install prefixes are created."
+            " (default: system temporary directory)"
+        ),
+    )
+    parser.add_argument(
+        "--sample_interval",
+        type=float,
+        default=1.0,
+        help="Seconds between filesystem usage samples. (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--keep-prefix",
+        action="store_true",
+        default=False,
+        help="Do not remove the install prefix afterwards. (default: %(default)s)",
+    )
+
+    args = parser.parse_args()
+
+    if not args.installer.name.endswith(".sh"):
+        raise ValueError(f"Only .sh installers can be benchmarked: {args.installer}")
+
+    result = benchmark(
+        installer_path=args.installer.absolute(),
+        modules=args.modules or ["gnuradio", "numpy"],
+        work_dir=args.work_dir,
+        sample_interval=args.sample_interval,
+        keep_prefix=args.keep_prefix,
+    )
+
+    print(json.dumps(result, indent=2))
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with args.output.open("w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline is not None:
+        with args.baseline.open("r") as f:
+            baseline = json.load(f)
+        regressions = compare(
+            result, baseline, threshold=args.threshold, min_seconds=args.min_seconds
+        )
+        if regressions:
+            print(f"Regressions over baseline: {', '.join(regressions)}")
+            sys.exit(1)
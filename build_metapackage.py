@@ -2,7 +2,7 @@
 import pathlib
 from typing import List
 
-import yaml
+import yaml_io
 
 
 def read_env_file(
@@ -13,7 +13,7 @@ def read_env_file(
     fallback_channels: List[str],
 ) -> dict:
     with env_file.open("r") as f:
-        env_dict = yaml.safe_load(f)
+        env_dict = yaml_io.safe_load(f)
 
     env_dict.setdefault("name", fallback_name)
     env_dict.setdefault("version", fallback_version)
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+import concurrent.futures
+import json
+import os
+import pathlib
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+import yaml_io
+from build_installer import spec_dir_extract_platform
+from package_metadata import PackageMetadataStore
+
+# virtual packages to solve for on each target platform (as conda-lock does), so that
+# the host's own __glibc/__osx/__win and CPU are not used for foreign platforms
+virtual_package_overrides = {
+    "linux-64": dict(GLIBC="2.17", LINUX="5.10", ARCHSPEC="x86_64"),
+    "linux-aarch64": dict(GLIBC="2.17", LINUX="5.10", ARCHSPEC="aarch64"),
+    "linux-ppc64le": dict(GLIBC="2.17", LINUX="5.10", ARCHSPEC="ppc64le"),
+    "osx-64": dict(OSX="10.15", ARCHSPEC="x86_64"),
+    "osx-arm64": dict(OSX="11.0", ARCHSPEC="arm64"),
+    "win-64": dict(WIN="0", ARCHSPEC="x86_64"),
+}
+
+
+def read_locked_specs(installer_spec_dir: pathlib.Path) -> Dict[str, Any]:
+    with (installer_spec_dir / "construct.yaml").open("r") as f:
+        construct_dict = yaml_io.safe_load(f)
+    return construct_dict
+
+
+def get_pkgs_dirs(conda_exe: str) -> List[pathlib.Path]:
+    proc = subprocess.run(
+        [conda_exe, "info", "--json"], capture_output=True, text=True, check=True
+    )
+    return [pathlib.Path(p) for p in json.loads(proc.stdout)["pkgs_dirs"]]
+
+
+def read_cached_pkg_sizes(
+    dist_name: str, pkgs_dirs: List[pathlib.Path]
+) -> Dict[str, Optional[int]]:
+    """Look up download and installed sizes of a package in the local pkgs cache."""
+    sizes: Dict[str, Optional[int]] = dict(download_bytes=None, installed_bytes=None)
+    for pkgs_dir in pkgs_dirs:
+        info_dir = pkgs_dir / dist_name / "info"
+        record_path = info_dir / "repodata_record.json"
+        if sizes["download_bytes"] is None and record_path.exists():
+            with record_path.open("r") as f:
+                sizes["download_bytes"] = json.load(f).get("size")
+        paths_path = info_dir / "paths.json"
+        if sizes["installed_bytes"] is None and paths_path.exists():
+            with paths_path.open("r") as f:
+                paths = json.load(f)["paths"]
+            sizes["installed_bytes"] = sum(p.get("size_in_bytes", 0) for p in paths)
+    return sizes
+
+
+def solve_with_pins(
+    conda_exe: str,
+    platform: str,
+    channels: List[str],
+    pinned_specs: List[str],
+    candidate_specs: List[str],
+) -> Dict[str, Any]:
+    cmdline = [
+        conda_exe,
+        "create",
+        "--name",
+        "radioconda-estimate",
+        "--dry-run",
+        "--json",
+        "--offline",
+        "--override-channels",
+    ]
+    for channel in channels:
+        cmdline.extend(["--channel", channel])
+    cmdline.extend(pinned_specs + candidate_specs)
+
+    env = os.environ.copy()
+    env["CONDA_SUBDIR"] = platform
+    env["CONDA_OVERRIDE_CUDA"] = ""
+    for name, value in virtual_package_overrides[platform].items():
+        env[f"CONDA_OVERRIDE_{name}"] = value
+
+    proc = subprocess.run(cmdline, env=env, capture_output=True, text=True)
+    try:
+        result = json.loads(proc.stdout)
+    except json.JSONDecodeError:
+        raise RuntimeError(f"Solve failed for {platform}: {proc.stderr.strip()}")
+    if not result.get("success", False):
+        message = result.get("message") or result.get("error") or "unknown error"
+        raise RuntimeError(f"Solve failed for {platform}: {message}")
+    return result["actions"]
+
+
+def estimate_platform(
+    installer_spec_dir: pathlib.Path,
+    candidate_specs: List[str],
+    conda_exe: str,
+    pkgs_dirs: List[pathlib.Path],
+) -> Dict[str, Any]:
+    platform = spec_dir_extract_platform(installer_spec_dir)
+    construct_dict = read_locked_specs(installer_spec_dir)
+    # locked specs are exact "name=version=build" pins
+    locked_names = {spec.partition("=")[0] for spec in construct_dict["specs"]}
+
+    actions = solve_with_pins(
+        conda_exe=conda_exe,
+        platform=platform,
+        channels=construct_dict["channels"],
+        pinned_specs=construct_dict["specs"],
+        candidate_specs=candidate_specs,
+    )
+    # fetch records are full package records, without the dist_name of link records
+    fetch_records = {
+        (rec["name"], rec["version"], rec["build"]): rec
+        for rec in actions.get("FETCH", [])
+    }
+
+    added = []
+    for rec in actions.get("LINK", []):
+        if rec["name"] in locked_names:
+            continue
+        sizes = read_cached_pkg_sizes(rec["dist_name"], pkgs_dirs)
+        # packages that are not cached are fetched, and only fetch records carry
+        # the url and hashes needed to look up their metadata
+        fetch_rec = fetch_records.get(
+            (rec["name"], rec["version"], rec["build_string"]), {}
+        )
+        if fetch_rec:
+            sizes["download_bytes"] = fetch_rec.get("size")
+        added.append(
+            dict(
+                name=rec["name"],
+                version=rec["version"],
+                build=rec["build_string"],
+                channel=rec.get("channel"),
+                url=fetch_rec.get("url"),
+                md5=fetch_rec.get("md5"),
+                sha256=fetch_rec.get("sha256"),
+                **sizes,
+            )
+        )
+    added.sort(key=lambda pkg: pkg["name"])
+
+    return dict(platform=platform, packages=added)
+
+
+def fill_installed_sizes(
+    results: Dict[str, Dict[str, Any]],
+    store: PackageMetadataStore,
+    stream: bool = True,
+    max_workers: int = 16,
+) -> None:
+    """Fill in installed sizes not found in the local pkgs cache.
+
+    Sizes are read from the package metadata store, after streaming the metadata of
+    packages that are not yet stored when stream is True.
+    """
+    unknown: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results.values():
+        for pkg in result.get("packages", []):
+            if pkg["installed_bytes"] is None and pkg["md5"] is not None:
+                unknown.setdefault(pkg["md5"], []).append(pkg)
+
+    if stream:
+        # packages that cannot be streamed (e.g. when offline) keep an unknown size
+        failures = store.add_packages(
+            [pkgs[0] for pkgs in unknown.values()], max_workers=max_workers
+        )
+        for url, error in failures.items():
+            print(f"Cannot stream metadata of {url}: {error}", file=sys.stderr)
+
+    for md5, pkgs in unknown.items():
+        row = store.get_package(md5)
+        if row is not None:
+            for pkg in pkgs:
+                pkg["installed_bytes"] = row["installed_bytes"]
+
+
+def summarize_sizes(result: Dict[str, Any]) -> None:
+    added = result["packages"]
+    result["download_bytes"] = sum(pkg["download_bytes"] or 0 for pkg in added)
+    # number of packages whose installed size could not be determined, the total
+    # is only an estimate if there are none
+    result["installed_unknown"] = sum(pkg["installed_bytes"] is None for pkg in added)
+    result["installed_known_bytes"] = sum(pkg["installed_bytes"] or 0 for pkg in added)
+    result["installed_bytes"] = (
+        None if result["installed_unknown"] else result["installed_known_bytes"]
+    )
+
+
+def estimate(
+    installer_spec_dirs: List[pathlib.Path],
+    candidate_specs: List[str],
+    store: PackageMetadataStore,
+    conda_exe: str = "conda",
+    stream: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    pkgs_dirs = get_pkgs_dirs(conda_exe)
+    results = {}
+    # each platform is an independent solve, so run them concurrently
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        futures = {
+            executor.submit(
+                estimate_platform,
+                installer_spec_dir=spec_dir,
+                candidate_specs=candidate_specs,
+                conda_exe=conda_exe,
+                pkgs_dirs=pkgs_dirs,
+            ): spec_dir_extract_platform(spec_dir)
+            for spec_dir in installer_spec_dirs
+        }
+        for future in concurrent.futures.as_completed(futures):
+            platform = futures[future]
+            try:
+                results[platform] = future.result()
+            except RuntimeError as e:
+                results[platform] = dict(platform=platform, error=str(e))
+
+    fill_installed_sizes(results, store, stream=stream)
+    for result in results.values():
+        if "error" not in result:
+            summarize_sizes(result)
+    return dict(sorted(results.items()))
+
+
+def format_bytes(num_bytes: int) -> str:
+    return f"{num_bytes / 2**20:.1f} MiB"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from package_metadata import default_db_path
+
+    cwd = pathlib.Path(".").absolute()
+    here = pathlib.Path(__file__).parent.absolute().relative_to(cwd)
+    distname = os.getenv("DISTNAME", "radioconda")
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Estimate the cost of adding packages to the distribution by solving for"
+            " the candidate specs with all currently locked packages pinned, using only"
+            " locally cached repodata. Reports the additional packages, download size,"
+            " and installed size for each platform."
+        )
+    )
+    parser.add_argument(
+        "candidate_specs",
+        nargs="+",
+        help="Package specs that are proposed for addition.",
+    )
+    parser.add_argument(
+        "-i",
+        "--installer_specs_dir",
+        type=pathlib.Path,
+        default=here / "installer_specs",
+        help=(
+            "Directory containing the rendered installer specification directories"
+            " with the current locked package set. (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "-p",
+        "--platform",
+        dest="platforms",
+        action="append",
+        default=None,
+        help=(
+            "Platform to estimate for, may be given multiple times."
+            " (default: all rendered platforms)"
+        ),
+    )
+    parser.add_argument(
+        "--conda-exe",
+        type=str,
+        default="conda",
+        help=(
+            "Path to the conda (or mamba) executable to use for solving."
+            " (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--db",
+        type=pathlib.Path,
+        default=default_db_path,
+        help=(
+            "Path to the SQLite package metadata database used for installed sizes."
+            " (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--no-stream",
+        dest="stream",
+        action="store_false",
+        default=True,
+        help=(
+            "Do not stream the metadata of packages that are neither cached nor in"
+            " the metadata database, leaving their installed size unknown."
+        ),
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        default=False,
+        help="Output the full results as JSON. (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        default=False,
+        help="List each additional package. (default: %(default)s)",
+    )
+
+    args = parser.parse_args()
+
+    installer_spec_dirs = sorted(
+        path.parent
+        for path in args.installer_specs_dir.glob(f"{distname}-*/construct.yaml")
+    )
+    if args.platforms:
+        installer_spec_dirs = [
+            spec_dir
+            for spec_dir in installer_spec_dirs
+            if spec_dir_extract_platform(spec_dir) in args.platforms
+        ]
+    if not installer_spec_dirs:
+        raise ValueError(
+            f"No installer specification directories found in {args.installer_specs_dir}"
+        )
+
+    with PackageMetadataStore(args.db) as store:
+        results = estimate(
+            installer_spec_dirs=installer_spec_dirs,
+            candidate_specs=args.candidate_specs,
+            store=store,
+            conda_exe=args.conda_exe,
+            stream=args.stream,
+        )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for platform, result in results.items():
+            if "error" in result:
+                print(f"{platform}: {result['error']}")
+                continue
+            if result["installed_bytes"] is not None:
+                installed = f"{format_bytes(result['installed_bytes'])} installed"
+            elif result["installed_known_bytes"]:
+                installed = (
+                    f"at least {format_bytes(result['installed_known_bytes'])}"
+                    f" installed ({result['installed_unknown']} packages of unknown"
+                    " size)"
+                )
+            else:
+                installed = "unknown installed size"
+            print(
+                f"{platform}: {len(result['packages'])} additional packages,"
+                f" {format_bytes(result['download_bytes'])} download,"
+                f" {installed}"
+            )
+            if args.verbose:
+                for pkg in result["packages"]:
+                    print(
+                        f"    {pkg['name']}={pkg['version']}={pkg['build']}"
+                        f"  {format_bytes(pkg['download_bytes'] or 0)}"
+                    )
+
+    if any("error" in result for result in results.values()):
+        sys.exit(1)
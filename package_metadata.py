@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+import concurrent.futures
+import contextlib
+import json
+import pathlib
+import re
+import shlex
+import sqlite3
+import urllib.parse
+from typing import Any, Dict, Iterable, List, Optional
+
+from conda_package_streaming.package_streaming import stream_conda_component
+from conda_package_streaming.url import conda_reader_for_url
+
+import yaml_io
+
+# conda-lock masks channel tokens in package URLs as /t/*****/, strip them for download
+url_token_re = re.compile(r"/t/[^/]+/")
+
+# bump when the schema changes incompatibly, lock_packages is rebuilt on update
+schema_version = 1
+
+schema = """
+CREATE TABLE IF NOT EXISTS packages (
+    md5 TEXT PRIMARY KEY,
+    sha256 TEXT,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    build TEXT NOT NULL,
+    subdir TEXT,
+    filename TEXT NOT NULL,
+    url TEXT NOT NULL,
+    license TEXT,
+    installed_bytes INTEGER NOT NULL,
+    file_count INTEGER NOT NULL,
+    prefix_file_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS packages_sha256 ON packages (sha256);
+CREATE INDEX IF NOT EXISTS packages_name ON packages (name);
+CREATE INDEX IF NOT EXISTS packages_installed_bytes ON packages (installed_bytes);
+
+CREATE TABLE IF NOT EXISTS dependencies (
+    md5 TEXT NOT NULL REFERENCES packages (md5),
+    name TEXT NOT NULL,
+    spec TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dependencies_md5 ON dependencies (md5);
+CREATE INDEX IF NOT EXISTS dependencies_name ON dependencies (name);
+
+CREATE TABLE IF NOT EXISTS files (
+    md5 TEXT NOT NULL REFERENCES packages (md5),
+    path TEXT NOT NULL,
+    path_type TEXT,
+    size_in_bytes INTEGER,
+    prefix_placeholder TEXT,
+    file_mode TEXT
+);
+CREATE INDEX IF NOT EXISTS files_md5 ON files (md5);
+CREATE INDEX IF NOT EXISTS files_path ON files (path);
+
+CREATE TABLE IF NOT EXISTS lock_packages (
+    lock TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    md5 TEXT NOT NULL REFERENCES packages (md5),
+    PRIMARY KEY (lock, platform, md5)
+);
+CREATE INDEX IF NOT EXISTS lock_packages_platform ON lock_packages (platform);
+CREATE INDEX IF NOT EXISTS lock_packages_md5 ON lock_packages (md5);
+"""
+
+
+def read_explicit_lock(lockfile_path: pathlib.Path) -> Dict[str, Any]:
+    """Read the platform and package URLs/hashes from an explicit .lock file."""
+    platform = None
+    pkgs = []
+    with lockfile_path.open("r") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("# platform:"):
+                platform = line.partition(":")[2].strip()
+            if not line or line.startswith(("#", "@")):
+                continue
+            url, _, md5 = line.partition("#")
+            pkgs.append(dict(url=url, md5=md5, sha256=None))
+    if platform is None:
+        raise ValueError(f"Cannot identify platform of lock file: {lockfile_path}")
+    return {platform: pkgs}
+
+
+def read_conda_lock(lockfile_path: pathlib.Path) -> Dict[str, Any]:
+    """Read the package URLs/hashes for each platform from a conda-lock file."""
+    platform_pkgs: Dict[str, List[Dict[str, Any]]] = {}
+    for pkg in yaml_io.iter_lock_packages(lockfile_path):
+        if pkg["manager"] != "conda":
+            continue
+        platform_pkgs.setdefault(pkg["platform"], []).append(
+            dict(url=pkg["url"], md5=pkg["hash"]["md5"], sha256=pkg["hash"]["sha256"])
+        )
+    return platform_pkgs
+
+
+def read_lock(lockfile_path: pathlib.Path) -> Dict[str, Any]:
+    if lockfile_path.suffix == ".lock":
+        return read_explicit_lock(lockfile_path)
+    return read_conda_lock(lockfile_path)
+
+
+def stream_package_info(url: str) -> Dict[str, Any]:
+    """Stream just the info/ metadata files of a package from its URL."""
+    url = url_token_re.sub("/", url)
+    filename, conda_pkg = conda_reader_for_url(url)
+    info_files = {}
+    with contextlib.closing(conda_pkg):
+        for tar, member in stream_conda_component(filename, conda_pkg, "info"):
+            if not member.name.startswith("info/"):
+                # .tar.bz2 packages have no separate info component, but conda-build
+                # writes info/ first, so stop once we are past it
+                if info_files:
+                    break
+                continue
+            if member.name in ("info/index.json", "info/paths.json", "info/has_prefix"):
+                info_files[member.name] = tar.extractfile(member).read().decode()
+
+    index = json.loads(info_files["info/index.json"])
+    if "info/paths.json" in info_files:
+        paths = json.loads(info_files["info/paths.json"])["paths"]
+    else:
+        paths = []
+    # old packages without paths.json only list placeholder files in has_prefix
+    if not paths and "info/has_prefix" in info_files:
+        for line in info_files["info/has_prefix"].splitlines():
+            # entries are 'placeholder mode path' (possibly quoted) or just 'path'
+            parts = shlex.split(line.strip())
+            if len(parts) == 3:
+                placeholder, file_mode, path = parts
+            elif parts:
+                placeholder, file_mode, path = None, "text", parts[0]
+            else:
+                continue
+            paths.append(
+                dict(
+                    _path=path,
+                    path_type="hardlink",
+                    prefix_placeholder=placeholder,
+                    file_mode=file_mode,
+                )
+            )
+
+    return dict(
+        filename=urllib.parse.unquote(filename),
+        url=url,
+        index=index,
+        paths=paths,
+    )
+
+
+class PackageMetadataStore:
+    """Local SQLite store of package metadata, keyed by the locked package hash.
+
+    Packages are identified by the md5 hash that every lock records; the sha256
+    hash is stored as well when the lock provides it (conda-lock files do,
+    explicit .lock files do not).
+    """
+
+    def __init__(self, db_path: pathlib.Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        (user_version,) = self.conn.execute("PRAGMA user_version").fetchone()
+        if user_version < schema_version:
+            # lock_packages only records lock contents, so it can be dropped and
+            # repopulated by updating from the lock files again
+            self.conn.execute("DROP TABLE IF EXISTS lock_packages")
+            self.conn.execute(f"PRAGMA user_version = {schema_version}")
+        self.conn.executescript(schema)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def has_package(self, md5: str) -> bool:
+        cur = self.conn.execute("SELECT 1 FROM packages WHERE md5 = ?", (md5,))
+        return cur.fetchone() is not None
+
+    def insert_package(self, md5: str, sha256: Optional[str], info: Dict[str, Any]):
+        index = info["index"]
+        paths = info["paths"]
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO packages VALUES"
+                " (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    md5,
+                    sha256,
+                    index["name"],
+                    index["version"],
+                    index["build"],
+                    index.get("subdir"),
+                    info["filename"],
+                    info["url"],
+                    index.get("license"),
+                    sum(p.get("size_in_bytes", 0) for p in paths),
+                    len(paths),
+                    sum(p.get("prefix_placeholder") is not None for p in paths),
+                ),
+            )
+            self.conn.execute("DELETE FROM dependencies WHERE md5 = ?", (md5,))
+            self.conn.executemany(
+                "INSERT INTO dependencies VALUES (?, ?, ?)",
+                [(md5, spec.split()[0], spec) for spec in index.get("depends", [])],
+            )
+            self.conn.execute("DELETE FROM files WHERE md5 = ?", (md5,))
+            self.conn.executemany(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        md5,
+                        p["_path"],
+                        p.get("path_type"),
+                        p.get("size_in_bytes"),
+                        p.get("prefix_placeholder"),
+                        p.get("file_mode"),
+                    )
+                    for p in paths
+                ],
+            )
+
+    def add_packages(
+        self, pkgs: Iterable[Dict[str, Any]], max_workers: int = 16
+    ) -> Dict[str, str]:
+        """Stream and store the metadata of the given packages that are not stored.
+
+        Each package is a dict with its url, md5, and sha256 (which may be None).
+        Returns the error message for each package url that could not be streamed.
+        """
+        missing = {pkg["md5"]: pkg for pkg in pkgs if not self.has_package(pkg["md5"])}
+        failures = {}
+        # stream in parallel, but write from this thread since the sqlite
+        # connection cannot be shared between threads
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = {
+                executor.submit(stream_package_info, pkg["url"]): pkg
+                for pkg in missing.values()
+            }
+            for future in concurrent.futures.as_completed(futures):
+                pkg = futures[future]
+                try:
+                    info = future.result()
+                except Exception as e:
+                    failures[pkg["url"]] = repr(e)
+                    continue
+                self.insert_package(pkg["md5"], pkg["sha256"], info)
+        return failures
+
+    def update_from_lock(
+        self, lockfile_path: pathlib.Path, max_workers: int = 16
+    ) -> Dict[str, int]:
+        """Record the packages of a lock, streaming metadata for any not yet stored.
+
+        Returns the number of newly stored packages for each platform in the lock.
+        """
+        lock_name = lockfile_path.name
+        added = {}
+        for platform, pkgs in read_lock(lockfile_path).items():
+            missing = {
+                pkg["md5"]: pkg for pkg in pkgs if not self.has_package(pkg["md5"])
+            }
+            failures = self.add_packages(missing.values(), max_workers=max_workers)
+            if failures:
+                raise RuntimeError(
+                    f"Cannot stream metadata of {len(failures)} packages for"
+                    f" {platform} from {lockfile_path}: {failures}"
+                )
+
+            with self.conn:
+                # fill in sha256 for packages first stored from an explicit lock
+                self.conn.executemany(
+                    "UPDATE packages SET sha256 = ? WHERE md5 = ? AND sha256 IS NULL",
+                    [(pkg["sha256"], pkg["md5"]) for pkg in pkgs if pkg["sha256"]],
+                )
+                self.conn.execute(
+                    "DELETE FROM lock_packages WHERE lock = ? AND platform = ?",
+                    (lock_name, platform),
+                )
+                self.conn.executemany(
+                    "INSERT INTO lock_packages VALUES (?, ?, ?)",
+                    [(lock_name, platform, pkg["md5"]) for pkg in pkgs],
+                )
+            num_recorded = len(self.get_lock_packages(platform, lock=lock_name))
+            if num_recorded != len(pkgs):
+                raise RuntimeError(
+                    f"Recorded {num_recorded} of {len(pkgs)} packages for {platform}"
+                    f" from {lockfile_path}"
+                )
+            added[platform] = len(missing)
+        return added
+
+    def query(
+        self,
+        name: Optional[str] = None,
+        platform: Optional[str] = None,
+        path: Optional[str] = None,
+        min_bytes: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> List[sqlite3.Row]:
+        """Find packages matching all of the given criteria.
+
+        The path criterion is a glob pattern matched against the files installed by
+        the package, e.g. "bin/gnuradio-*".
+        """
+        clauses = []
+        params: List[Any] = []
+        if name is not None:
+            clauses.append("p.name = ?")
+            params.append(name)
+        if platform is not None:
+            clauses.append(
+                "p.md5 IN (SELECT md5 FROM lock_packages WHERE platform = ?)"
+            )
+            params.append(platform)
+        if path is not None:
+            clauses.append("p.md5 IN (SELECT md5 FROM files WHERE path GLOB ?)")
+            params.append(path)
+        if min_bytes is not None:
+            clauses.append("p.installed_bytes >= ?")
+            params.append(min_bytes)
+        if max_bytes is not None:
+            clauses.append("p.installed_bytes <= ?")
+            params.append(max_bytes)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cur = self.conn.execute(
+            f"SELECT p.* FROM packages p {where} ORDER BY p.name, p.version", params
+        )
+        return cur.fetchall()
+
+    def get_package(self, pkg_hash: str) -> Optional[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT * FROM packages WHERE md5 = ? OR sha256 = ?", (pkg_hash, pkg_hash)
+        )
+        return cur.fetchone()
+
+    def get_dependencies(self, md5: str) -> List[str]:
+        cur = self.conn.execute("SELECT spec FROM dependencies WHERE md5 = ?", (md5,))
+        return [row["spec"] for row in cur]
+
+    def get_files(self, md5: str) -> List[sqlite3.Row]:
+        cur = self.conn.execute("SELECT * FROM files WHERE md5 = ?", (md5,))
+        return cur.fetchall()
+
+    def get_prefix_files(self, md5: str) -> List[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT * FROM files WHERE md5 = ? AND prefix_placeholder IS NOT NULL",
+            (md5,),
+        )
+        return cur.fetchall()
+
+    def get_lock_packages(
+        self, platform: str, lock: Optional[str] = None
+    ) -> List[sqlite3.Row]:
+        """Get the packages recorded for a platform, optionally from one lock file."""
+        if lock is None:
+            # a package can be recorded for the platform by more than one lock
+            cur = self.conn.execute(
+                "SELECT p.* FROM packages p WHERE p.md5 IN"
+                " (SELECT md5 FROM lock_packages WHERE platform = ?) ORDER BY p.name",
+                (platform,),
+            )
+        else:
+            cur = self.conn.execute(
+                "SELECT p.* FROM packages p JOIN lock_packages l ON p.md5 = l.md5"
+                " WHERE l.platform = ? AND l.lock = ? ORDER BY p.name",
+                (platform, lock),
+            )
+        return cur.fetchall()
+
+
+def iter_lockfiles(paths: Iterable[pathlib.Path]) -> Iterable[pathlib.Path]:
+    for path in paths:
+        if path.is_dir():
+            yield from sorted(path.glob("*.lock"))
+            yield from sorted(path.glob("*.conda-lock.yml"))
+        else:
+            yield path
+
+
+default_db_path = pathlib.Path.home() / ".cache" / "radioconda" / "package_metadata.db"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    cwd = pathlib.Path(".").absolute()
+    here = pathlib.Path(__file__).parent.absolute().relative_to(cwd)
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Maintain and query a local store of package metadata (sizes,"
+            " dependencies, file lists, licenses, prefix placeholder files) for the"
+            " locked packages, populated by streaming only the info/ component of each"
+            " package."
+        )
+    )
+    parser.add_argument(
+        "--db",
+        type=pathlib.Path,
+        default=default_db_path,
+        help="Path to the SQLite metadata database. (default: %(default)s)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update_parser = subparsers.add_parser(
+        "update", help="Store metadata for the packages in lock files."
+    )
+    update_parser.add_argument(
+        "lockfiles",
+        type=pathlib.Path,
+        nargs="*",
+        default=[here / "installer_specs"],
+        help=(
+            "Explicit .lock or conda-lock .yml files, or directories containing them."
+            " (default: %(default)s)"
+        ),
+    )
+    update_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=16,
+        help="Number of packages to stream in parallel. (default: %(default)s)",
+    )
+
+    query_parser = subparsers.add_parser(
+        "query", help="Find stored packages matching all given criteria."
+    )
+    query_parser.add_argument("--name", help="Package name.")
+    query_parser.add_argument("--platform", help="Platform of a lock with the package.")
+    query_parser.add_argument(
+        "--path", help="Glob pattern for a file installed by the package."
+    )
+    query_parser.add_argument(
+        "--min-bytes", type=int, default=None, help="Minimum installed size."
+    )
+    query_parser.add_argument(
+        "--max-bytes", type=int, default=None, help="Maximum installed size."
+    )
+    query_parser.add_argument(
+        "--json",
+        action="store_true",
+        default=False,
+        help="Output the matching packages as JSON. (default: %(default)s)",
+    )
+
+    show_parser = subparsers.add_parser(
+        "show", help="Show the stored metadata of a package by md5 or sha256 hash."
+    )
+    show_parser.add_argument("hash", help="md5 or sha256 hash of the package.")
+
+    args = parser.parse_args()
+
+    with PackageMetadataStore(args.db) as store:
+        if args.command == "update":
+            for lockfile_path in iter_lockfiles(args.lockfiles):
+                added = store.update_from_lock(lockfile_path, max_workers=args.jobs)
+                for platform, num_added in added.items():
+                    print(f"{lockfile_path} ({platform}): {num_added} new packages")
+        elif args.command == "query":
+            rows = store.query(
+                name=args.name,
+                platform=args.platform,
+                path=args.path,
+                min_bytes=args.min_bytes,
+                max_bytes=args.max_bytes,
+            )
+            if args.json:
+                print(json.dumps([dict(row) for row in rows], indent=2))
+            else:
+                for row in rows:
+                    print(
+                        f"{row['name']}={row['version']}={row['build']}"
+                        f"  {row['subdir']}  {row['installed_bytes']} bytes"
+                        f"  {row['file_count']} files  {row['md5']}"
+                    )
+        elif args.command == "show":
+            row = store.get_package(args.hash)
+            if row is None:
+                raise ValueError(f"No package stored with hash: {args.hash}")
+            pkg = dict(row)
+            pkg["depends"] = store.get_dependencies(row["md5"])
+            pkg["files"] = [dict(f) for f in store.get_files(row["md5"])]
+            print(json.dumps(pkg, indent=2))
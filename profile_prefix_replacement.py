@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+import contextlib
+import pathlib
+import re
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from conda_package_streaming.package_streaming import stream_conda_component
+from conda_package_streaming.url import conda_reader_for_url
+
+from package_metadata import PackageMetadataStore, read_lock, url_token_re
+
+
+def text_replace(data: bytes, placeholder: bytes, new_prefix: bytes) -> bytes:
+    return data.replace(placeholder, new_prefix)
+
+
+def binary_replace(data: bytes, placeholder: bytes, new_prefix: bytes) -> bytes:
+    """Replace the placeholder in null-terminated strings, padding to keep length.
+
+    This follows the binary replacement that conda performs when linking.
+    """
+
+    def replace(match):
+        occurrences = match.group().count(placeholder)
+        padding = (len(placeholder) - len(new_prefix)) * occurrences
+        if padding < 0:
+            raise ValueError("New prefix is longer than the placeholder")
+        return match.group().replace(placeholder, new_prefix) + b"\0" * padding
+
+    pattern = re.compile(re.escape(placeholder) + b"(?:(?!(?:\0)).)*\0", re.DOTALL)
+    return pattern.sub(replace, data)
+
+
+def summarize_prefix_files(
+    store: PackageMetadataStore, platform: str, lock: str
+) -> List[Dict[str, Any]]:
+    """Count placeholder files and bytes for each package of a lock."""
+    summaries = []
+    for pkg in store.get_lock_packages(platform, lock=lock):
+        prefix_files = store.get_prefix_files(pkg["md5"])
+        text_files = [f for f in prefix_files if f["file_mode"] != "binary"]
+        binary_files = [f for f in prefix_files if f["file_mode"] == "binary"]
+        post_link = [
+            f["path"]
+            for f in store.get_files(pkg["md5"])
+            if re.search(r"\.[^/\\]+-(pre|post)-link\.(sh|bat)$", f["path"])
+        ]
+        summaries.append(
+            dict(
+                name=pkg["name"],
+                version=pkg["version"],
+                build=pkg["build"],
+                md5=pkg["md5"],
+                url=pkg["url"],
+                filename=pkg["filename"],
+                text_files=len(text_files),
+                text_bytes=sum(f["size_in_bytes"] or 0 for f in text_files),
+                binary_files=len(binary_files),
+                binary_bytes=sum(f["size_in_bytes"] or 0 for f in binary_files),
+                link_scripts=post_link,
+            )
+        )
+    return summaries
+
+
+def extract_prefix_files(
+    url: str, prefix_files: Dict[str, Any], extract_dir: pathlib.Path
+) -> None:
+    """Stream a package and extract only the files containing prefix placeholders."""
+    url = url_token_re.sub("/", url)
+    filename, conda_pkg = conda_reader_for_url(url)
+    with contextlib.closing(conda_pkg):
+        for tar, member in stream_conda_component(filename, conda_pkg, "pkg"):
+            if member.name in prefix_files and member.isfile():
+                target_path = extract_dir / member.name
+                target_path.parent.mkdir(parents=True, exist_ok=True)
+                with target_path.open("wb") as f:
+                    shutil.copyfileobj(tar.extractfile(member), f)
+
+
+def replay_replacement(
+    extract_dir: pathlib.Path, prefix_files: Dict[str, Any], new_prefix: str
+) -> Dict[str, Any]:
+    """Rewrite extracted placeholder files in place, timing each file.
+
+    Binary files whose placeholder is shorter than the new prefix cannot be
+    rewritten and are skipped and reported.
+    """
+    observations: Dict[str, List[Tuple[int, float]]] = dict(text=[], binary=[])
+    skipped = []
+    for path, prefix_file in prefix_files.items():
+        file_path = extract_dir / path
+        if not file_path.exists():
+            continue
+        mode = "binary" if prefix_file["file_mode"] == "binary" else "text"
+        replace = binary_replace if mode == "binary" else text_replace
+        placeholder = prefix_file["prefix_placeholder"].encode()
+
+        start = time.perf_counter()
+        with file_path.open("rb") as f:
+            data = f.read()
+        try:
+            data = replace(data, placeholder, new_prefix.encode())
+        except ValueError as e:
+            skipped.append(dict(path=path, reason=str(e)))
+            continue
+        with file_path.open("wb") as f:
+            f.write(data)
+        observations[mode].append((len(data), time.perf_counter() - start))
+    return dict(observations=observations, skipped=skipped)
+
+
+def fit_cost_model(observations: List[Tuple[int, float]]) -> Dict[str, float]:
+    """Fit the per-file rewrite time as seconds_per_file + bytes * seconds_per_byte.
+
+    This is an ordinary least squares fit over the (bytes, seconds) observations,
+    constrained so that neither cost is negative.
+    """
+    if not observations:
+        return dict(seconds_per_file=0.0, seconds_per_byte=0.0)
+    n = len(observations)
+    mean_bytes = sum(b for b, _ in observations) / n
+    mean_seconds = sum(t for _, t in observations) / n
+    var_bytes = sum((b - mean_bytes) ** 2 for b, _ in observations)
+    cov = sum((b - mean_bytes) * (t - mean_seconds) for b, t in observations)
+    seconds_per_byte = cov / var_bytes if var_bytes > 0 else 0.0
+    seconds_per_file = mean_seconds - seconds_per_byte * mean_bytes
+    if seconds_per_byte <= 0:
+        # no measurable size dependence, all of the cost is per file
+        seconds_per_byte, seconds_per_file = 0.0, mean_seconds
+    elif seconds_per_file < 0:
+        # no measurable fixed cost, all of the cost is per byte
+        seconds_per_byte, seconds_per_file = mean_seconds / mean_bytes, 0.0
+    return dict(seconds_per_file=seconds_per_file, seconds_per_byte=seconds_per_byte)
+
+
+def profile(
+    store: PackageMetadataStore,
+    lockfile_path: pathlib.Path,
+    new_prefix: str,
+    num_samples: int = 5,
+    work_dir: Optional[pathlib.Path] = None,
+) -> Dict[str, Any]:
+    store.update_from_lock(lockfile_path)
+    (platform,) = read_lock(lockfile_path).keys()
+    summaries = summarize_prefix_files(store, platform, lockfile_path.name)
+
+    # replay on the packages with the most placeholder files and bytes, timing each
+    # file, to fit how the rewrite cost depends on file count and size
+    summaries.sort(key=lambda s: s["text_bytes"] + s["binary_bytes"], reverse=True)
+    sample_pkgs = summaries[:num_samples]
+    summaries.sort(key=lambda s: s["text_files"] + s["binary_files"], reverse=True)
+    sample_pkgs += [s for s in summaries[:num_samples] if s not in sample_pkgs]
+
+    observations: Dict[str, List[Tuple[int, float]]] = dict(text=[], binary=[])
+    samples = []
+    skipped = []
+    tmp_dir = pathlib.Path(tempfile.mkdtemp(prefix="radioconda-prefix-", dir=work_dir))
+    try:
+        for summary in sample_pkgs:
+            prefix_files = {
+                f["path"]: f for f in store.get_prefix_files(summary["md5"])
+            }
+            extract_dir = tmp_dir / summary["md5"]
+            extract_prefix_files(summary["url"], prefix_files, extract_dir)
+            replay = replay_replacement(extract_dir, prefix_files, new_prefix)
+            sample = dict(name=summary["name"])
+            for mode, mode_observations in replay["observations"].items():
+                observations[mode].extend(mode_observations)
+                sample[f"{mode}_files"] = len(mode_observations)
+                sample[f"{mode}_bytes"] = sum(b for b, _ in mode_observations)
+                sample[f"{mode}_seconds"] = sum(t for _, t in mode_observations)
+            samples.append(sample)
+            skipped.extend(dict(name=summary["name"], **s) for s in replay["skipped"])
+            shutil.rmtree(extract_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    cost_model = {mode: fit_cost_model(observations[mode]) for mode in observations}
+
+    for summary in summaries:
+        summary["estimated_seconds"] = sum(
+            summary[f"{mode}_files"] * model["seconds_per_file"]
+            + summary[f"{mode}_bytes"] * model["seconds_per_byte"]
+            for mode, model in cost_model.items()
+        )
+    summaries.sort(key=lambda s: s["estimated_seconds"], reverse=True)
+
+    return dict(
+        lock=lockfile_path.name,
+        platform=platform,
+        new_prefix=new_prefix,
+        cost_model=cost_model,
+        samples=samples,
+        skipped=skipped,
+        packages=summaries,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import os
+
+    from package_metadata import default_db_path
+
+    cwd = pathlib.Path(".").absolute()
+    here = pathlib.Path(__file__).parent.absolute().relative_to(cwd)
+    distname = os.getenv("DISTNAME", "radioconda")
+    platform = os.getenv("PLATFORM", "linux-64")
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Profile the cost of prefix replacement at install time for the packages"
+            " in a lock file. Counts the files and bytes with prefix placeholders per"
+            " package from the package metadata store, then replays the replacement"
+            " on an extracted sample to fit per-file and per-byte rewrite costs and"
+            " rank the packages by estimated rewrite time."
+        )
+    )
+    parser.add_argument(
+        "lockfile",
+        type=pathlib.Path,
+        nargs="?",
+        default=here / "installer_specs" / f"{distname}-{platform}.lock",
+        help="Explicit .lock file for a single platform. (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--db",
+        type=pathlib.Path,
+        default=default_db_path,
+        help="Path to the SQLite metadata database. (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-n",
+        "--samples",
+        type=int,
+        default=5,
+        help=(
+            "Number of packages with the most placeholder bytes, and again with the"
+            " most placeholder files, to extract and replay replacement on."
+            " (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--new-prefix",
+        default=f"/opt/{distname}",
+        help="Prefix to substitute for the placeholders. (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--work_dir",
+        type=pathlib.Path,
+        default=None,
+        help=(
+            "Directory in which sample packages are extracted, e.g. on the disk of"
+            " interest. (default: system temporary directory)"
+        ),
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=25,
+        help="Number of packages to list in the report. (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        default=False,
+        help="Output the full results as JSON. (default: %(default)s)",
+    )
+
+    args = parser.parse_args()
+
+    with PackageMetadataStore(args.db) as store:
+        result = profile(
+            store=store,
+            lockfile_path=args.lockfile,
+            new_prefix=args.new_prefix,
+            num_samples=args.samples,
+            work_dir=args.work_dir,
+        )
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for mode, model in result["cost_model"].items():
+            rate = (
+                f"{2**-20 / model['seconds_per_byte']:.1f} MiB/s"
+                if model["seconds_per_byte"] > 0
+                else "unmeasured"
+            )
+            print(
+                f"Fitted {mode} rewrite cost:"
+                f" {model['seconds_per_file'] * 1e3:.3f} ms per file, {rate}"
+            )
+        if result["skipped"]:
+            print(
+                f"Skipped {len(result['skipped'])} sampled files that cannot be"
+                f" rewritten with the new prefix:"
+            )
+            for skip in result["skipped"]:
+                print(f"    {skip['name']}: {skip['path']} ({skip['reason']})")
+        print(
+            f"{'package':<32} {'text':>7} {'MiB':>8} {'binary':>7} {'MiB':>8}"
+            f" {'est. s':>8}  link scripts"
+        )
+        for summary in result["packages"][: args.top]:
+            print(
+                f"{summary['name']:<32}"
+                f" {summary['text_files']:>7}"
+                f" {summary['text_bytes'] / 2**20:>8.1f}"
+                f" {summary['binary_files']:>7}"
+                f" {summary['binary_bytes'] / 2**20:>8.1f}"
+                f" {summary['estimated_seconds']:>8.2f}"
+                f"  {len(summary['link_scripts']) or ''}"
+            )
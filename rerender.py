@@ -1,17 +1,26 @@
 #!/usr/bin/env python3
+import concurrent.futures
 import contextlib
+import hashlib
 import math
 import pathlib
 import shutil
-from typing import Any, Dict, Optional
+import subprocess
+import sys
+import urllib.parse
+from typing import Any, Dict, Iterable, List, Optional, Set
 
 import conda_lock
 import diff_match_patch
-import yaml
+import requests
+from conda_lock.src_parser.selectors import filter_platform_selectors
 from conda_package_streaming.package_streaming import stream_conda_component
 from conda_package_streaming.url import conda_reader_for_url
 from PIL import Image
 
+import yaml_io
+from package_metadata import read_explicit_lock, url_token_re
+
 
 def resize_contain(image, size, resample=Image.LANCZOS, bg_color=(255, 255, 255, 0)):
     """
@@ -57,11 +66,17 @@ def write_env_file(
     if variables:
         env_dict["variables"] = variables
     with file_path.open("w") as f:
-        yaml.safe_dump(env_dict, stream=f)
+        yaml_io.safe_dump(env_dict, stream=f)
 
     return env_dict
 
 
+def platform_env_variables(platform: str) -> Optional[dict]:
+    if platform.startswith("win"):
+        return dict(GR_PREFIX="", GRC_BLOCKS_PATH="", UHD_PKG_PATH="", VOLK_PREFIX="")
+    return None
+
+
 def render_metapackage_environments(
     lockfile_path: pathlib.Path,
     requested_pkg_names: Dict[str, Any],
@@ -84,7 +99,7 @@ def render_metapackage_environments(
         platform = platform_env_yaml_name.split(sep="-", maxsplit=1)[1]
 
         with platform_env_yaml_path.open("r") as f:
-            platform_env_dict = yaml.safe_load(f)
+            platform_env_dict = yaml_io.safe_load(f)
 
         dependencies = sorted(platform_env_dict["dependencies"])
         # filter the dependency list by the explicitly listed package names
@@ -94,21 +109,211 @@ def render_metapackage_environments(
             if name_from_pkg_spec(spec) in requested_pkg_names
         ]
 
-        if platform.startswith("win"):
-            variables = dict(
-                GR_PREFIX="", GRC_BLOCKS_PATH="", UHD_PKG_PATH="", VOLK_PREFIX=""
-            )
-        else:
-            variables = None
         write_env_file(
             env_dict=platform_env_dict,
             file_path=output_dir / f"{platform_env_yaml_name}.yml",
             name=name,
             version=version,
             platform=platform,
-            variables=variables,
+            variables=platform_env_variables(platform),
+        )
+
+
+def lock_dependency_closure(
+    lock_content: Any, platform: str, pkg_names: Iterable[str]
+) -> Set[str]:
+    """Find the names of the locked packages needed to install pkg_names."""
+    lockdeps = {
+        lockdep.name: lockdep
+        for lockdep in lock_content.package
+        if lockdep.platform == platform and lockdep.manager == "conda"
+    }
+    closure = set()
+    pending = [pkg_name for pkg_name in pkg_names if pkg_name in lockdeps]
+    while pending:
+        pkg_name = pending.pop()
+        if pkg_name in closure:
+            continue
+        closure.add(pkg_name)
+        # dependencies not in the lock are virtual packages, e.g. __glibc
+        pending.extend(
+            dep for dep in lockdeps[pkg_name].dependencies if dep in lockdeps
+        )
+    return closure
+
+
+def render_component_packs(
+    lock_content: Any,
+    platform: str,
+    specs: List[str],
+    channels: List[str],
+    user_requested_specs: List[str],
+    components: Dict[str, List[str]],
+    name: str,
+    version: str,
+    output_dir: pathlib.Path,
+) -> List[str]:
+    """Write an explicit lock and metapackage env for each component pack.
+
+    Each pack consists of the locked packages needed by its component packages
+    that are not already needed by the core (non-component) packages. Returns the
+    specs that remain for the core installer.
+    """
+    component_pkg_names = {
+        pkg_name for pkg_names in components.values() for pkg_name in pkg_names
+    }
+    core_pkg_names = lock_dependency_closure(
+        lock_content,
+        platform,
+        [
+            pkg_name
+            for pkg_name in user_requested_specs
+            if pkg_name not in component_pkg_names
+        ],
+    )
+    for component, pkg_names in components.items():
+        component_requested = [
+            pkg_name for pkg_name in pkg_names if pkg_name in user_requested_specs
+        ]
+        if not component_requested:
+            # component is not available on this platform (e.g. due to selectors)
+            continue
+        pack_pkg_names = (
+            lock_dependency_closure(lock_content, platform, component_requested)
+            - core_pkg_names
+        )
+        pack_name = f"{name}-{component}"
+
+        # keep the lock's (dependency) order, since explicit installs link packages
+        # in file order, so dependencies must precede their dependents
+        with (output_dir / f"{pack_name}-{platform}.lock").open("w") as f:
+            f.write(f"# platform: {platform}\n@EXPLICIT\n")
+            for lockdep in lock_content.package:
+                if (
+                    lockdep.platform == platform
+                    and lockdep.manager == "conda"
+                    and lockdep.name in pack_pkg_names
+                ):
+                    f.write(f"{lockdep.url}#{lockdep.hash.md5}\n")
+
+        write_env_file(
+            env_dict=dict(
+                channels=channels,
+                dependencies=[
+                    spec
+                    for spec in specs
+                    if name_from_pkg_spec(spec) in component_requested
+                ],
+            ),
+            file_path=output_dir / f"{pack_name}-{platform}.yml",
+            name=pack_name,
+            version=version,
+            platform=platform,
         )
 
+    return [spec for spec in specs if name_from_pkg_spec(spec) in core_pkg_names]
+
+
+def write_constructor_dir(
+    constructor_dir: pathlib.Path,
+    platform: str,
+    name: str,
+    version: str,
+    company: str,
+    channels: List[str],
+    specs: List[str],
+    user_requested_specs: List[str],
+    license_file: pathlib.Path,
+    logo: Optional[Image.Image] = None,
+) -> None:
+    """Write construct.yaml and its supporting files to a fresh constructor_dir."""
+    if constructor_dir.exists():
+        shutil.rmtree(constructor_dir)
+    constructor_dir.mkdir(parents=True)
+
+    construct_dict = dict(
+        name=name,
+        version=version,
+        company=company,
+        channels=channels,
+        specs=specs,
+        user_requested_specs=user_requested_specs,
+        initialize_by_default=False if platform.startswith("win") else True,
+        installer_type="all",
+        keep_pkgs=True,
+        license_file="LICENSE",
+        register_python_default=False,
+        write_condarc=True,
+        condarc=dict(
+            channels=channels,
+            channel_priority="strict",
+        ),
+    )
+    if logo is not None:
+        if platform.startswith("win"):
+            # convert to RGB (no transparency) and set white background
+            # because constructor eventually converts to bmp without transparency
+            welcome_image = resize_contain(
+                logo, (164, 314), bg_color=(255, 255, 255, 255)
+            ).convert("RGB")
+            header_image = resize_contain(
+                logo, (150, 57), bg_color=(255, 255, 255, 255)
+            ).convert("RGB")
+            icon_image = resize_contain(logo, (256, 256))
+
+            welcome_image.save(constructor_dir / "welcome.png")
+            header_image.save(constructor_dir / "header.png")
+            icon_image.save(constructor_dir / "icon.png")
+
+            construct_dict["welcome_image"] = "welcome.png"
+            construct_dict["header_image"] = "header.png"
+            construct_dict["icon_image"] = "icon.png"
+        elif platform.startswith("osx"):
+            welcome_image = resize_contain(logo, (1227, 600))
+            welcome_image.save(constructor_dir / "welcome.png")
+            construct_dict["welcome_image"] = "welcome.png"
+    if platform.startswith("win"):
+        construct_dict["post_install"] = "post_install.bat"
+        # point to template that we generate at build time with a patch over default
+        construct_dict["nsis_template"] = "main.nsi.tmpl"
+    else:
+        construct_dict["post_install"] = "post_install.sh"
+
+    # copy license to the constructor directory
+    shutil.copy(license_file, constructor_dir / "LICENSE")
+
+    # write the post_install scripts referenced in the construct dict
+    if platform.startswith("win"):
+        with (constructor_dir / "post_install.bat").open("w") as f:
+            f.write(
+                "\n".join(
+                    (
+                        r'echo {"env_vars": {"GR_PREFIX": "", "GRC_BLOCKS_PATH": "", "UHD_PKG_PATH": "", "VOLK_PREFIX": ""}}>%PREFIX%\conda-meta\state',
+                        r"del /q %PREFIX%\pkgs\*.tar.bz2",
+                        r"del /q %PREFIX%\pkgs\*.conda",
+                        "exit 0",
+                        "",
+                    )
+                )
+            )
+    else:
+        with (constructor_dir / "post_install.sh").open("w") as f:
+            f.write(
+                "\n".join(
+                    (
+                        "#!/bin/sh",
+                        f'PREFIX="${{PREFIX:-$2/{name}}}"',
+                        r"rm -f $PREFIX/pkgs/*.tar.bz2 $PREFIX/pkgs/*.conda",
+                        "exit 0",
+                        "",
+                    )
+                )
+            )
+
+    construct_yaml_path = constructor_dir / "construct.yaml"
+    with construct_yaml_path.open("w") as f:
+        yaml_io.safe_dump(construct_dict, stream=f)
+
 
 def render_constructors(
     lockfile_path: pathlib.Path,
@@ -118,20 +323,21 @@ def render_constructors(
     company: str,
     license_file: pathlib.Path,
     output_dir: pathlib.Path,
-    builder_lockfile_path: pathlib.Path,
+    builder_lockfile_path: Optional[pathlib.Path],
     logo_path: Optional[pathlib.Path] = None,
+    components: Optional[Dict[str, List[str]]] = None,
 ) -> None:
     lock_content = conda_lock.conda_lock.parse_conda_lock_file(lockfile_path)
     lock_work_dir = lockfile_path.parent
 
-    builder_lock_content = conda_lock.conda_lock.parse_conda_lock_file(
-        builder_lockfile_path
-    )
-    constructor_lockdeps = [
-        lockdep
-        for lockdep in builder_lock_content.package
-        if lockdep.name == "constructor"
-    ]
+    # the builder lock is only needed to patch the NSIS template for Windows
+    if builder_lockfile_path is not None:
+        # stream just the constructor entries instead of parsing the whole lock
+        constructor_lockdeps = list(
+            yaml_io.iter_lock_packages(builder_lockfile_path, names={"constructor"})
+        )
+    else:
+        constructor_lockdeps = []
 
     # render main + installer env specs into environment file for creating installer
     conda_lock.conda_lock.do_render(
@@ -141,20 +347,16 @@ def render_constructors(
         extras=("installer",),
     )
 
-    if logo_path is not None:
-        logo = Image.open(logo_path)
+    logo = Image.open(logo_path) if logo_path is not None else None
 
     for platform_env_yaml_path in lock_work_dir.glob("*.constructor.yml"):
         constructor_name = platform_env_yaml_path.name.partition(".")[0]
         platform = constructor_name.split(sep="-", maxsplit=1)[1]
 
         constructor_dir = output_dir / constructor_name
-        if constructor_dir.exists():
-            shutil.rmtree(constructor_dir)
-        constructor_dir.mkdir(parents=True)
 
         with platform_env_yaml_path.open("r") as f:
-            platform_env_dict = yaml.safe_load(f)
+            platform_env_dict = yaml_io.safe_load(f)
 
         # filter requested_pkg_names by locked environment to account for selectors
         platform_env_pkg_names = [
@@ -163,103 +365,52 @@ def render_constructors(
         user_requested_specs = [
             name for name in requested_pkg_names if name in platform_env_pkg_names
         ]
+        specs = sorted(platform_env_dict["dependencies"])
+
+        # split component packs out of the installer, leaving the core
+        if components:
+            specs = render_component_packs(
+                lock_content=lock_content,
+                platform=platform,
+                specs=specs,
+                channels=platform_env_dict["channels"],
+                user_requested_specs=user_requested_specs,
+                components=components,
+                name=name,
+                version=version,
+                output_dir=output_dir,
+            )
+            core_pkg_names = [name_from_pkg_spec(spec) for spec in specs]
+            user_requested_specs = [
+                name for name in user_requested_specs if name in core_pkg_names
+            ]
 
-        construct_dict = dict(
+        write_constructor_dir(
+            constructor_dir=constructor_dir,
+            platform=platform,
             name=name,
             version=version,
             company=company,
             channels=platform_env_dict["channels"],
-            specs=sorted(platform_env_dict["dependencies"]),
+            specs=specs,
             user_requested_specs=user_requested_specs,
-            initialize_by_default=False if platform.startswith("win") else True,
-            installer_type="all",
-            keep_pkgs=True,
-            license_file="LICENSE",
-            register_python_default=False,
-            write_condarc=True,
-            condarc=dict(
-                channels=platform_env_dict["channels"],
-                channel_priority="strict",
-            ),
+            license_file=license_file,
+            logo=logo,
         )
-        if logo_path is not None:
-            if platform.startswith("win"):
-                # convert to RGB (no transparency) and set white background
-                # because constructor eventually converts to bmp without transparency
-                welcome_image = resize_contain(
-                    logo, (164, 314), bg_color=(255, 255, 255, 255)
-                ).convert("RGB")
-                header_image = resize_contain(
-                    logo, (150, 57), bg_color=(255, 255, 255, 255)
-                ).convert("RGB")
-                icon_image = resize_contain(logo, (256, 256))
-
-                welcome_image.save(constructor_dir / "welcome.png")
-                header_image.save(constructor_dir / "header.png")
-                icon_image.save(constructor_dir / "icon.png")
-
-                construct_dict["welcome_image"] = "welcome.png"
-                construct_dict["header_image"] = "header.png"
-                construct_dict["icon_image"] = "icon.png"
-            elif platform.startswith("osx"):
-                welcome_image = resize_contain(logo, (1227, 600))
-                welcome_image.save(constructor_dir / "welcome.png")
-                construct_dict["welcome_image"] = "welcome.png"
-        if platform.startswith("win"):
-            construct_dict["post_install"] = "post_install.bat"
-            # point to template that we generate at build time with a patch over default
-            construct_dict["nsis_template"] = "main.nsi.tmpl"
-        else:
-            construct_dict["post_install"] = "post_install.sh"
-
-        # copy license to the constructor directory
-        shutil.copy(license_file, constructor_dir / "LICENSE")
-
-        # write the post_install scripts referenced in the construct dict
-        if platform.startswith("win"):
-            with (constructor_dir / "post_install.bat").open("w") as f:
-                f.write(
-                    "\n".join(
-                        (
-                            r'echo {"env_vars": {"GR_PREFIX": "", "GRC_BLOCKS_PATH": "", "UHD_PKG_PATH": "", "VOLK_PREFIX": ""}}>%PREFIX%\conda-meta\state',
-                            r"del /q %PREFIX%\pkgs\*.tar.bz2",
-                            r"del /q %PREFIX%\pkgs\*.conda",
-                            "exit 0",
-                            "",
-                        )
-                    )
-                )
-        else:
-            with (constructor_dir / "post_install.sh").open("w") as f:
-                f.write(
-                    "\n".join(
-                        (
-                            "#!/bin/sh",
-                            f'PREFIX="${{PREFIX:-$2/{name}}}"',
-                            r"rm -f $PREFIX/pkgs/*.tar.bz2 $PREFIX/pkgs/*.conda",
-                            "exit 0",
-                            "",
-                        )
-                    )
-                )
-
-        construct_yaml_path = constructor_dir / "construct.yaml"
-        with construct_yaml_path.open("w") as f:
-            yaml.safe_dump(construct_dict, stream=f)
 
         if platform.startswith("win"):
             # patch constructor's nsis template
             constructor_platform_lockdeps = [
                 lockdep
                 for lockdep in constructor_lockdeps
-                if lockdep.platform == platform
+                if lockdep["platform"] == platform
             ]
             if constructor_platform_lockdeps:
                 lockdep = constructor_platform_lockdeps[0]
 
                 # get the NSIS template that comes with the locked constructor package
                 constructor_filename, constructor_pkg = conda_reader_for_url(
-                    lockdep.url
+                    lockdep["url"]
                 )
                 with contextlib.closing(constructor_pkg):
                     for tar, member in stream_conda_component(
@@ -302,33 +453,43 @@ def render_constructors(
                     f.write(patched_nsi_tmpl)
 
 
-def render(
+def read_render_inputs(
     environment_file: pathlib.Path,
     installer_environment_file: pathlib.Path,
-    builder_environment_file: pathlib.Path,
-    version: str,
-    company: str,
     license_file: pathlib.Path,
-    output_dir: pathlib.Path,
-    conda_exe: pathlib.Path,
-    logo_path: Optional[pathlib.Path] = None,
-    dirty: Optional[bool] = False,
-    keep_workdir: Optional[bool] = False,
-) -> None:
+    split_components: Optional[bool] = False,
+) -> Dict[str, Any]:
+    """Read and check the inputs shared by all render modes."""
     with environment_file.open("r") as f:
-        env_yaml_data = yaml.safe_load(f)
+        env_yaml_data = yaml_io.safe_load(f)
     with installer_environment_file.open("r") as f:
-        base_env_yaml_data = yaml.safe_load(f)
+        base_env_yaml_data = yaml_io.safe_load(f)
 
-    env_name = env_yaml_data["name"]
     env_pkg_names = [name_from_pkg_spec(spec) for spec in env_yaml_data["dependencies"]]
     base_env_pkg_names = [
         name_from_pkg_spec(spec) for spec in base_env_yaml_data["dependencies"]
     ]
+    if split_components:
+        components = read_components(env_yaml_data, env_pkg_names)
+    else:
+        components = None
 
     if not license_file.exists():
         raise ValueError(f"Cannot find license file: {license_file}")
 
+    return dict(
+        env_name=env_yaml_data["name"],
+        platforms=env_yaml_data["platforms"],
+        env_pkg_names=env_pkg_names,
+        base_env_pkg_names=base_env_pkg_names,
+        components=components,
+    )
+
+
+def reset_output_dir(
+    output_dir: pathlib.Path, dirty: Optional[bool] = False
+) -> pathlib.Path:
+    """Clear the output directory (unless dirty) and return the conda-lock work dir."""
     if output_dir.exists() and not dirty:
         shutil.rmtree(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -336,8 +497,15 @@ def render(
     # working dir for conda-lock outputs that we use as intermediates
     lock_work_dir = output_dir / "lockwork"
     lock_work_dir.mkdir(parents=True, exist_ok=True)
+    return lock_work_dir
+
 
-    # create the locked build environment specification
+def lock_builder(
+    builder_environment_file: pathlib.Path,
+    conda_exe: pathlib.Path,
+    output_dir: pathlib.Path,
+) -> pathlib.Path:
+    """Create the locked build environment specification and return its path."""
     builder_lockfile_path = output_dir / "buildenv.conda-lock.yml"
     conda_lock.conda_lock.run_lock(
         environment_files=[builder_environment_file],
@@ -347,6 +515,41 @@ def render(
         kinds=("lock",),
         lockfile_path=builder_lockfile_path,
     )
+    return builder_lockfile_path
+
+
+def render(
+    environment_file: pathlib.Path,
+    installer_environment_file: pathlib.Path,
+    builder_environment_file: pathlib.Path,
+    version: str,
+    company: str,
+    license_file: pathlib.Path,
+    output_dir: pathlib.Path,
+    conda_exe: pathlib.Path,
+    logo_path: Optional[pathlib.Path] = None,
+    dirty: Optional[bool] = False,
+    keep_workdir: Optional[bool] = False,
+    split_components: Optional[bool] = False,
+    cache_dir: Optional[pathlib.Path] = None,
+) -> None:
+    inputs = read_render_inputs(
+        environment_file=environment_file,
+        installer_environment_file=installer_environment_file,
+        license_file=license_file,
+        split_components=split_components,
+    )
+    env_name = inputs["env_name"]
+    env_pkg_names = inputs["env_pkg_names"]
+    base_env_pkg_names = inputs["base_env_pkg_names"]
+
+    lock_work_dir = reset_output_dir(output_dir, dirty=dirty)
+
+    builder_lockfile_path = lock_builder(
+        builder_environment_file=builder_environment_file,
+        conda_exe=conda_exe,
+        output_dir=output_dir,
+    )
 
     # read environment files and create the lock file
     lockfile_path = lock_work_dir / f"{env_name}.conda-lock.yml"
@@ -387,12 +590,499 @@ def render(
         output_dir=output_dir,
         builder_lockfile_path=builder_lockfile_path,
         logo_path=logo_path,
+        components=inputs["components"],
+    )
+
+    if cache_dir is not None:
+        for platform in inputs["platforms"]:
+            prefetch_platform(
+                platform=platform,
+                env_name=env_name,
+                lockfile_path=lockfile_path,
+                output_dir=output_dir,
+                cache_dir=cache_dir,
+                components=inputs["components"],
+            )
+
+    # clean up conda-lock work dir
+    if not keep_workdir:
+        shutil.rmtree(lock_work_dir)
+
+
+def read_components(
+    env_yaml_data: Dict[str, Any], env_pkg_names: List[str]
+) -> Dict[str, List[str]]:
+    components = env_yaml_data.get("components", {})
+    for component, pkg_names in components.items():
+        unknown_pkg_names = set(pkg_names) - set(env_pkg_names)
+        if unknown_pkg_names:
+            raise ValueError(
+                f"Component '{component}' lists packages that are not dependencies:"
+                f" {sorted(unknown_pkg_names)}"
+            )
+    return components
+
+
+def read_selected_pkg_names(env_file: pathlib.Path, platform: str) -> List[str]:
+    """Read the names of an environment file's dependencies that apply to platform.
+
+    Platform `# [selector]` comments are filtered by conda-lock's own parser so
+    that the selection matches what conda-lock solved for.
+    """
+    with env_file.open("r") as f:
+        env_text = f.read()
+    env_yaml_data = yaml_io.safe_load(
+        "\n".join(filter_platform_selectors(env_text, platform))
+    )
+    return [name_from_pkg_spec(spec) for spec in env_yaml_data["dependencies"]]
+
+
+def pkg_spec_from_url(url: str) -> str:
+    """Get the exact 'name=version=build' spec of a package from its URL."""
+    filename = urllib.parse.unquote(url.partition("#")[0].rsplit("/", maxsplit=1)[1])
+    for ext in (".conda", ".tar.bz2"):
+        if filename.endswith(ext):
+            filename = filename[: -len(ext)]
+    pkg_name, pkg_version, pkg_build = filename.rsplit("-", maxsplit=2)
+    return f"{pkg_name}={pkg_version}={pkg_build}"
+
+
+def render_reskin(
+    environment_file: pathlib.Path,
+    installer_environment_file: pathlib.Path,
+    version: str,
+    company: str,
+    license_file: pathlib.Path,
+    output_dir: pathlib.Path,
+    logo_path: Optional[pathlib.Path] = None,
+) -> None:
+    """Re-render the metapackage environments and constructor directories in place
+    from the existing explicit .lock files and construct.yaml specs, without solving.
+
+    This is for changes that do not affect the package set, such as the version,
+    company, logo, license, or NSIS template. A ValueError is raised if the
+    environment files request a different set of packages than the one that is
+    locked, in which case a full render is needed.
+    """
+    with environment_file.open("r") as f:
+        env_yaml_data = yaml_io.safe_load(f)
+
+    env_name = env_yaml_data["name"]
+
+    if not license_file.exists():
+        raise ValueError(f"Cannot find license file: {license_file}")
+
+    logo = Image.open(logo_path) if logo_path is not None else None
+    nsis_template_path = pathlib.Path("constructor") / "nsis" / "main.nsi.tmpl"
+
+    for platform in env_yaml_data["platforms"]:
+        explicit_lockfile_path = output_dir / f"{env_name}-{platform}.lock"
+        constructor_dir = output_dir / f"{env_name}-{platform}"
+        construct_yaml_path = constructor_dir / "construct.yaml"
+        if not explicit_lockfile_path.exists() or not construct_yaml_path.exists():
+            raise ValueError(
+                f"Cannot re-skin {platform} without an existing rendering, missing"
+                f" {explicit_lockfile_path} or {construct_yaml_path}"
+            )
+
+        with construct_yaml_path.open("r") as f:
+            prev_construct_dict = yaml_io.safe_load(f)
+        specs = prev_construct_dict["specs"]
+        channels = prev_construct_dict["channels"]
+        locked_pkg_names = [name_from_pkg_spec(spec) for spec in specs]
+
+        # check that the pinned package set is unchanged: the explicit lock and the
+        # previous installer specs must agree...
+        with explicit_lockfile_path.open("r") as f:
+            explicit_specs = {
+                pkg_spec_from_url(line.strip())
+                for line in f
+                if line.strip() and not line.startswith(("#", "@"))
+            }
+        unmatched_specs = explicit_specs - set(specs)
+        if unmatched_specs:
+            raise ValueError(
+                f"Locked packages for {platform} are missing from {construct_yaml_path}"
+                f" (full render needed): {sorted(unmatched_specs)}"
+            )
+        # ...and the environment files must request the same packages as before
+        env_pkg_names = read_selected_pkg_names(environment_file, platform)
+        base_env_pkg_names = read_selected_pkg_names(
+            installer_environment_file, platform
+        )
+        requested_pkg_names = sorted(env_pkg_names + base_env_pkg_names)
+        if requested_pkg_names != prev_construct_dict["user_requested_specs"]:
+            prev_requested_pkg_names = set(prev_construct_dict["user_requested_specs"])
+            added = set(requested_pkg_names) - prev_requested_pkg_names
+            removed = prev_requested_pkg_names - set(requested_pkg_names)
+            raise ValueError(
+                f"Requested packages for {platform} differ from the locked set (full"
+                f" render needed), added: {sorted(added)}, removed: {sorted(removed)}"
+            )
+        unlocked_pkg_names = set(requested_pkg_names) - set(locked_pkg_names)
+        if unlocked_pkg_names:
+            raise ValueError(
+                f"Requested packages for {platform} are missing from"
+                f" {construct_yaml_path} (full render needed):"
+                f" {sorted(unlocked_pkg_names)}"
+            )
+
+        write_env_file(
+            env_dict=dict(
+                channels=list(channels),
+                dependencies=[
+                    spec
+                    for spec in sorted(specs)
+                    if name_from_pkg_spec(spec) in env_pkg_names
+                ],
+            ),
+            file_path=output_dir / f"{env_name}-{platform}.yml",
+            name=env_name,
+            version=version,
+            platform=platform,
+            variables=platform_env_variables(platform),
+        )
+
+        write_constructor_dir(
+            constructor_dir=constructor_dir,
+            platform=platform,
+            name=env_name,
+            version=version,
+            company=company,
+            channels=channels,
+            specs=specs,
+            user_requested_specs=requested_pkg_names,
+            license_file=license_file,
+            logo=logo,
+        )
+        if platform.startswith("win"):
+            # the committed custom template is kept patched for the locked constructor
+            shutil.copy(nsis_template_path, constructor_dir / "main.nsi.tmpl")
+
+
+def lock_platform(
+    environment_files: List[pathlib.Path],
+    platform: str,
+    conda_exe: pathlib.Path,
+    lockfile_path: pathlib.Path,
+) -> None:
+    conda_lock.conda_lock.run_lock(
+        environment_files=environment_files,
+        conda_exe=conda_exe,
+        platforms=[platform],
+        mamba=True,
+        micromamba=True,
+        kinds=("lock",),
+        lockfile_path=lockfile_path,
+    )
+
+
+def file_md5(path: pathlib.Path) -> str:
+    file_hash = hashlib.md5()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(2**16), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def download_package(url: str, md5: str, pkg_path: pathlib.Path) -> None:
+    if pkg_path.exists() and file_md5(pkg_path) == md5:
+        return
+    response = requests.get(url=url, stream=True)
+    response.raise_for_status()
+    pkg_hash = hashlib.md5()
+    tmp_path = pkg_path.with_name(pkg_path.name + ".partial")
+    with tmp_path.open("wb") as f:
+        for chunk in response.iter_content(chunk_size=2**16):
+            pkg_hash.update(chunk)
+            f.write(chunk)
+    if pkg_hash.hexdigest() != md5:
+        tmp_path.unlink()
+        raise RuntimeError(f"Checksum mismatch for downloaded package: {url}")
+    tmp_path.replace(pkg_path)
+
+
+def prefetch_packages(
+    pkgs: Iterable[Dict[str, Any]],
+    download_dir: pathlib.Path,
+    max_workers: int = 8,
+) -> None:
+    """Download packages (dicts with url and md5) into a conda package cache directory.
+
+    The directory's urls.txt records where each package came from, which conda needs
+    in order to install the packages' lock from the directory with --offline.
+    """
+    download_dir.mkdir(parents=True, exist_ok=True)
+
+    downloads = []
+    lock_urls = []
+    for pkg in pkgs:
+        lock_urls.append(pkg["url"])
+        url = url_token_re.sub("/", pkg["url"])
+        filename = urllib.parse.unquote(url.rsplit("/", maxsplit=1)[1])
+        downloads.append((url, pkg["md5"], download_dir / filename))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for future in [executor.submit(download_package, *dl) for dl in downloads]:
+            future.result()
+
+    urls_path = download_dir / "urls.txt"
+    known_urls = (
+        set(urls_path.read_text().splitlines()) if urls_path.exists() else set()
+    )
+    with urls_path.open("a") as f:
+        for url in lock_urls:
+            if url not in known_urls:
+                f.write(f"{url}\n")
+
+
+def prefetch_platform(
+    platform: str,
+    env_name: str,
+    lockfile_path: pathlib.Path,
+    output_dir: pathlib.Path,
+    cache_dir: pathlib.Path,
+    components: Optional[Dict[str, List[str]]] = None,
+) -> None:
+    """Prefetch a platform's installer packages and its component pack bundles.
+
+    The installer packages are those of the rendered construct.yaml specs (including
+    the installer category and excluding component packs), taken from the
+    conda-lock file, and go in constructor's cache layout, cache_dir/platform.
+    Each component pack's packages go in a bundle directory,
+    cache_dir/{env_name}-{component}-{platform}, from which the pack can be
+    installed offline by pointing CONDA_PKGS_DIRS at it.
+    """
+    with (output_dir / f"{env_name}-{platform}" / "construct.yaml").open("r") as f:
+        installer_specs = set(yaml_io.safe_load(f)["specs"])
+    installer_pkgs = [
+        dict(url=lockdep["url"], md5=lockdep["hash"]["md5"])
+        for lockdep in yaml_io.iter_lock_packages(lockfile_path, platforms=[platform])
+        if lockdep["manager"] == "conda"
+        and pkg_spec_from_url(lockdep["url"]) in installer_specs
+    ]
+    if len(installer_pkgs) != len(installer_specs):
+        raise RuntimeError(
+            f"Found {len(installer_pkgs)} of {len(installer_specs)} installer specs"
+            f" for {platform} in {lockfile_path}"
+        )
+    prefetch_packages(installer_pkgs, download_dir=cache_dir / platform)
+
+    for component in components or {}:
+        pack_name = f"{env_name}-{component}-{platform}"
+        pack_lockfile_path = output_dir / f"{pack_name}.lock"
+        # packs that are not available on the platform have no lock
+        if pack_lockfile_path.exists():
+            (pack_pkgs,) = read_explicit_lock(pack_lockfile_path).values()
+            prefetch_packages(pack_pkgs, download_dir=cache_dir / pack_name)
+
+
+def build_platform_installer(
+    constructor_dir: pathlib.Path,
+    dist_dir: pathlib.Path,
+    cache_dir: Optional[pathlib.Path] = None,
+) -> None:
+    cmdline = [
+        sys.executable,
+        pathlib.Path(__file__).parent / "build_installer.py",
+        constructor_dir,
+        "--output_dir",
+        dist_dir,
+    ]
+    if cache_dir is not None:
+        cmdline.extend(["--", "--cache-dir", cache_dir])
+    subprocess.run(cmdline, check=True)
+
+
+def render_platform(
+    platform: str,
+    environment_file: pathlib.Path,
+    installer_environment_file: pathlib.Path,
+    env_name: str,
+    env_pkg_names: List[str],
+    base_env_pkg_names: List[str],
+    version: str,
+    company: str,
+    license_file: pathlib.Path,
+    output_dir: pathlib.Path,
+    conda_exe: pathlib.Path,
+    solve_executor: concurrent.futures.Executor,
+    builder_lock_future: concurrent.futures.Future,
+    logo_path: Optional[pathlib.Path] = None,
+    components: Optional[Dict[str, List[str]]] = None,
+    cache_dir: Optional[pathlib.Path] = None,
+    dist_dir: Optional[pathlib.Path] = None,
+) -> None:
+    # separate work dir per platform so the rendering functions, which glob their
+    # lock file's directory, only see this platform's intermediate outputs
+    platform_work_dir = output_dir / "lockwork" / platform
+    platform_work_dir.mkdir(parents=True, exist_ok=True)
+
+    lockfile_path = platform_work_dir / f"{env_name}.conda-lock.yml"
+    solve_executor.submit(
+        lock_platform,
+        environment_files=[environment_file, installer_environment_file],
+        platform=platform,
+        conda_exe=conda_exe,
+        lockfile_path=lockfile_path,
+    ).result()
+    print(f"[{platform}] solved")
+
+    lock_content = conda_lock.conda_lock.parse_conda_lock_file(lockfile_path)
+    conda_lock.conda_lock.do_render(
+        lockfile=lock_content,
+        kinds=("explicit",),
+        filename_template=f"{output_dir}/{env_name}-{{platform}}.lock",
+    )
+    render_metapackage_environments(
+        lockfile_path=lockfile_path,
+        requested_pkg_names=env_pkg_names,
+        name=env_name,
+        version=version,
+        output_dir=output_dir,
+    )
+
+    # only the NSIS template patching for Windows needs the builder lock
+    if platform.startswith("win"):
+        builder_lockfile_path = builder_lock_future.result()
+    else:
+        builder_lockfile_path = None
+    render_constructors(
+        lockfile_path=lockfile_path,
+        requested_pkg_names=sorted(env_pkg_names + base_env_pkg_names),
+        name=env_name,
+        version=version,
+        company=company,
+        license_file=license_file,
+        output_dir=output_dir,
+        builder_lockfile_path=builder_lockfile_path,
+        logo_path=logo_path,
+        components=components,
+    )
+    print(f"[{platform}] rendered")
+
+    if cache_dir is not None:
+        prefetch_platform(
+            platform=platform,
+            env_name=env_name,
+            lockfile_path=lockfile_path,
+            output_dir=output_dir,
+            cache_dir=cache_dir,
+            components=components,
+        )
+        print(f"[{platform}] prefetched")
+
+    if dist_dir is not None:
+        build_platform_installer(
+            constructor_dir=output_dir / f"{env_name}-{platform}",
+            dist_dir=dist_dir,
+            cache_dir=cache_dir,
+        )
+        print(f"[{platform}] built")
+
+
+def render_pipelined(
+    environment_file: pathlib.Path,
+    installer_environment_file: pathlib.Path,
+    builder_environment_file: pathlib.Path,
+    version: str,
+    company: str,
+    license_file: pathlib.Path,
+    output_dir: pathlib.Path,
+    conda_exe: pathlib.Path,
+    logo_path: Optional[pathlib.Path] = None,
+    dirty: Optional[bool] = False,
+    keep_workdir: Optional[bool] = False,
+    split_components: Optional[bool] = False,
+    cache_dir: Optional[pathlib.Path] = None,
+    build_platforms: Optional[List[str]] = None,
+    dist_dir: Optional[pathlib.Path] = None,
+    max_workers: Optional[int] = None,
+) -> None:
+    """Render like `render`, but solve and process each platform independently.
+
+    Each platform proceeds to rendering its outputs (and optionally prefetching
+    packages and building its installer) as soon as its own solve finishes. A
+    failure on one platform does not stop the others; the failures are raised
+    together once every platform has finished.
+    """
+    inputs = read_render_inputs(
+        environment_file=environment_file,
+        installer_environment_file=installer_environment_file,
+        license_file=license_file,
+        split_components=split_components,
     )
+    platforms = inputs["platforms"]
+    build_platforms = build_platforms or []
+
+    unknown_build_platforms = set(build_platforms) - set(platforms)
+    if unknown_build_platforms:
+        raise ValueError(
+            f"Cannot build installers for unknown platforms: {unknown_build_platforms}"
+        )
+
+    lock_work_dir = reset_output_dir(output_dir, dirty=dirty)
+
+    # conda-lock sets the virtual package overrides for the platform being solved in
+    # os.environ, so concurrent solves must each run in their own process (one per
+    # platform plus one for the builder lock, so every solve can start immediately);
+    # the rest of each platform's work runs in a thread that waits on its solve
+    if max_workers is None:
+        max_workers = len(platforms) + 1
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers
+    ) as solve_executor, concurrent.futures.ThreadPoolExecutor(
+        max_workers=len(platforms)
+    ) as executor:
+        builder_lock_future = solve_executor.submit(
+            lock_builder,
+            builder_environment_file=builder_environment_file,
+            conda_exe=conda_exe,
+            output_dir=output_dir,
+        )
+        platform_futures = {
+            executor.submit(
+                render_platform,
+                platform=platform,
+                environment_file=environment_file,
+                installer_environment_file=installer_environment_file,
+                env_name=inputs["env_name"],
+                env_pkg_names=inputs["env_pkg_names"],
+                base_env_pkg_names=inputs["base_env_pkg_names"],
+                version=version,
+                company=company,
+                license_file=license_file,
+                output_dir=output_dir,
+                conda_exe=conda_exe,
+                solve_executor=solve_executor,
+                builder_lock_future=builder_lock_future,
+                logo_path=logo_path,
+                components=inputs["components"],
+                cache_dir=cache_dir,
+                dist_dir=dist_dir if platform in build_platforms else None,
+            ): platform
+            for platform in platforms
+        }
+
+        failures = {}
+        for future in concurrent.futures.as_completed(platform_futures):
+            platform = platform_futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"[{platform}] failed: {e!r}")
+                failures[platform] = e
+        if builder_lock_future.exception() is not None:
+            print(f"[buildenv] failed: {builder_lock_future.exception()!r}")
+            failures["buildenv"] = builder_lock_future.exception()
 
     # clean up conda-lock work dir
     if not keep_workdir:
         shutil.rmtree(lock_work_dir)
 
+    if failures:
+        raise RuntimeError(f"Rendering failed for platforms: {sorted(failures)}")
+
 
 if __name__ == "__main__":
     import argparse
@@ -526,18 +1216,119 @@ if __name__ == "__main__":
         ),
     )
 
+    parser.add_argument(
+        "--split-components",
+        action="store_true",
+        default=False,
+        help=(
+            "Leave the component packages listed under 'components' in the"
+            " environment_file out of the installers, and instead render an explicit"
+            " lock and metapackage environment for each component pack."
+            " (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--reskin",
+        action="store_true",
+        default=False,
+        help=(
+            "Re-render the metapackage environments and constructor directories in"
+            " output_dir from the existing explicit .lock files and construct.yaml"
+            " specs without solving, e.g. to change only the version, company, logo,"
+            " license, or NSIS template. (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        default=False,
+        help=(
+            "Solve each platform separately and render its outputs as soon as its"
+            " solve finishes, overlapping with the solves for other platforms."
+            " (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--prefetch",
+        dest="cache_dir",
+        type=pathlib.Path,
+        default=None,
+        help=(
+            "Download each platform's packages into this constructor cache directory"
+            " once it is rendered, along with a bundle directory of the packages of"
+            " each component pack. (default: no prefetch)"
+        ),
+    )
+    parser.add_argument(
+        "--build",
+        dest="build_platforms",
+        action="append",
+        default=None,
+        help=(
+            "With --pipeline, build the installer for this platform once it is"
+            " rendered (and prefetched), may be given multiple times."
+            " (default: no builds)"
+        ),
+    )
+    parser.add_argument(
+        "--dist_dir",
+        type=pathlib.Path,
+        default=here / "dist",
+        help=(
+            "Output directory for installers built with --build."
+            " (default: %(default)s)"
+        ),
+    )
+
     args = parser.parse_args()
 
-    render(
-        environment_file=args.environment_file,
-        installer_environment_file=args.installer_environment_file,
-        builder_environment_file=args.builder_environment_file,
-        version=args.version,
-        company=args.company,
-        license_file=args.license_file,
-        output_dir=args.output_dir,
-        conda_exe=args.conda_exe,
-        logo_path=args.logo_path,
-        dirty=args.dirty,
-        keep_workdir=args.keep_workdir,
-    )
+    if args.reskin:
+        if args.pipeline or args.split_components:
+            parser.error(
+                "--reskin cannot be used with --pipeline or --split-components"
+            )
+        render_reskin(
+            environment_file=args.environment_file,
+            installer_environment_file=args.installer_environment_file,
+            version=args.version,
+            company=args.company,
+            license_file=args.license_file,
+            output_dir=args.output_dir,
+            logo_path=args.logo_path,
+        )
+    elif args.pipeline:
+        render_pipelined(
+            environment_file=args.environment_file,
+            installer_environment_file=args.installer_environment_file,
+            builder_environment_file=args.builder_environment_file,
+            version=args.version,
+            company=args.company,
+            license_file=args.license_file,
+            output_dir=args.output_dir,
+            conda_exe=args.conda_exe,
+            logo_path=args.logo_path,
+            dirty=args.dirty,
+            keep_workdir=args.keep_workdir,
+            split_components=args.split_components,
+            cache_dir=args.cache_dir,
+            build_platforms=args.build_platforms,
+            dist_dir=args.dist_dir,
+        )
+    else:
+        if args.build_platforms:
+            parser.error("--build requires --pipeline")
+        render(
+            environment_file=args.environment_file,
+            installer_environment_file=args.installer_environment_file,
+            builder_environment_file=args.builder_environment_file,
+            version=args.version,
+            company=args.company,
+            license_file=args.license_file,
+            output_dir=args.output_dir,
+            conda_exe=args.conda_exe,
+            logo_path=args.logo_path,
+            dirty=args.dirty,
+            keep_workdir=args.keep_workdir,
+            split_components=args.split_components,
+            cache_dir=args.cache_dir,
+        )
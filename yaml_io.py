@@ -0,0 +1,110 @@
+import pathlib
+from typing import Any, Collection, Dict, Iterator, Optional
+
+import yaml
+
+# use the libyaml-based loader/dumper when available, they produce identical
+# results to the pure-Python implementations but are much faster
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
+
+
+def safe_load(stream) -> Any:
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def safe_dump(data: Any, stream=None, **kwds) -> Optional[str]:
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwds)
+
+
+def _compose_event_node(loader, event: yaml.Event, anchors: Dict[str, yaml.Node]):
+    """Compose the node starting with event from the loader's following events."""
+    if isinstance(event, yaml.AliasEvent):
+        return anchors[event.anchor]
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, style=event.style)
+    elif isinstance(event, yaml.SequenceStartEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+        node = yaml.SequenceNode(tag, [], flow_style=event.flow_style)
+        while not loader.check_event(yaml.SequenceEndEvent):
+            node.value.append(_compose_event_node(loader, loader.get_event(), anchors))
+        loader.get_event()
+    elif isinstance(event, yaml.MappingStartEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+        node = yaml.MappingNode(tag, [], flow_style=event.flow_style)
+        while not loader.check_event(yaml.MappingEndEvent):
+            key_node = _compose_event_node(loader, loader.get_event(), anchors)
+            value_node = _compose_event_node(loader, loader.get_event(), anchors)
+            node.value.append((key_node, value_node))
+        loader.get_event()
+    else:
+        raise yaml.YAMLError(f"Unexpected YAML event: {event}")
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+    return node
+
+
+def _mapping_node_scalar(node: yaml.MappingNode, key: str) -> Optional[str]:
+    for key_node, value_node in node.value:
+        if key_node.value == key and isinstance(value_node, yaml.ScalarNode):
+            return value_node.value
+    return None
+
+
+def iter_lock_packages(
+    lockfile_path: pathlib.Path,
+    names: Optional[Collection[str]] = None,
+    platforms: Optional[Collection[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Iterate over the package entries of a conda-lock file by streaming it.
+
+    Only one package entry is held in memory at a time, and only the entries
+    matching the given package names and platforms are fully constructed, so the
+    whole lock document is never built.
+    """
+    with lockfile_path.open("r") as f:
+        loader = SafeLoader(f)
+        try:
+            # advance to the sequence under the top-level 'package' key, skipping
+            # over the values of the other top-level keys
+            loader.get_event()  # StreamStartEvent
+            loader.get_event()  # DocumentStartEvent
+            loader.get_event()  # MappingStartEvent
+            while True:
+                if loader.check_event(yaml.MappingEndEvent):
+                    return
+                key_event = loader.get_event()
+                if (
+                    isinstance(key_event, yaml.ScalarEvent)
+                    and key_event.value == "package"
+                ):
+                    break
+                _compose_event_node(loader, loader.get_event(), {})
+            if not isinstance(loader.get_event(), yaml.SequenceStartEvent):
+                raise yaml.YAMLError(f"Expected a package list in {lockfile_path}")
+
+            while not loader.check_event(yaml.SequenceEndEvent):
+                node = _compose_event_node(loader, loader.get_event(), {})
+                if (
+                    names is not None
+                    and _mapping_node_scalar(node, "name") not in names
+                ):
+                    continue
+                if (
+                    platforms is not None
+                    and _mapping_node_scalar(node, "platform") not in platforms
+                ):
+                    continue
+                yield loader.construct_document(node)
+        finally:
+            loader.dispose()